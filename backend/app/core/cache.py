@@ -0,0 +1,40 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Bounded in-process cache with optional per-entry expiry
+    
+    Entries expire ``ttl_seconds`` after they were stored (never when None);
+    once ``max_size`` entries are held, storing evicts the oldest one.
+    """
+    
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    
+    def get(self, key: Hashable) -> Any:
+        """Get a cached value, or None if it is missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        stored_at, value = entry
+        if self.ttl_seconds is not None and time.monotonic() - stored_at >= self.ttl_seconds:
+            del self._entries[key]
+            return None
+        
+        return value
+    
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the oldest entry when full"""
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_size:
+            self._entries.popitem(last=False)
+        self._entries[key] = (time.monotonic(), value)
+    
+    def pop(self, key: Hashable):
+        """Drop a cached value, e.g. after the underlying data changed"""
+        self._entries.pop(key, None)
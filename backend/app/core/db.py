@@ -1,21 +1,38 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import NullPool
+from sqlalchemy import make_url, text
+import asyncio
 import logging
 
 from app.core.config import settings
+from app.core.serialization import json_dumps_str, json_loads
 
-# Create async engine
+# Tests open a fresh connection per checkout; elsewhere keep a warm, checked pool
+if settings.ENVIRONMENT == "test":
+    pool_options = {"poolclass": NullPool}
+else:
+    pool_options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True
+    }
+
+# Create async engine; asyncpg keeps prepared statements per connection
 engine = create_async_engine(
-    settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
+    make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg").update_query_dict(
+        {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+    ),
     echo=False,  # Disable SQL logging to reduce noise
-    poolclass=NullPool if settings.ENVIRONMENT == "test" else None,
+    json_serializer=json_dumps_str,
+    json_deserializer=json_loads,
     connect_args={
         "ssl": "require",
         "server_settings": {
             "application_name": "ComChat",
         }
-    }
+    },
+    **pool_options
 )
 
 # Create async session factory
@@ -38,6 +55,21 @@ async def init_db():
         logging.info("Database tables created successfully")
 
 
+
+async def warm_db_pool():
+    """Open the pooled connections up front so early requests skip connection setup"""
+    if settings.ENVIRONMENT == "test":
+        return
+    
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    
+    # Concurrent checkouts each open a distinct connection, which stays pooled
+    await asyncio.gather(*(ping() for _ in range(settings.DB_POOL_SIZE)))
+    logging.info(f"Database pool warmed with {settings.DB_POOL_SIZE} connections")
+
+
 async def get_db():
     """Dependency to get database session"""
     async with AsyncSessionLocal() as session:
@@ -5,8 +5,10 @@ from contextlib import asynccontextmanager
 import logging
 
 from app.core.config import settings
-from app.core.db import init_db
+from app.core.db import init_db, warm_db_pool
 from app.api.v1.router import api_router
+from app.services.webhook import close_webhook_client
+from app.services.workflow_engine import close_workflow_http_session
 
 # Configure logging to suppress SQLAlchemy noise
 logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
@@ -19,9 +21,12 @@ async def lifespan(app: FastAPI):
     # Startup
     logging.info("Starting up ComChat API...")
     await init_db()
+    await warm_db_pool()
     yield
     # Shutdown
     logging.info("Shutting down ComChat API...")
+    await close_webhook_client()
+    await close_workflow_http_session()
 
 
 app = FastAPI(
@@ -9,6 +9,8 @@ from app.core.db import Base
 
 class Tenant(Base):
     __tablename__ = "tenants"
+    # Fetch server-generated timestamps via RETURNING instead of a refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
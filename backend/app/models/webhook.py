@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, JSON, Integer
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, JSON, Integer, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -9,6 +9,11 @@ from app.core.db import Base
 
 class Webhook(Base):
     __tablename__ = "webhooks"
+    __table_args__ = (
+        # Supports the events::jsonb @> '["<event>"]' subscriber lookup;
+        # the column stays JSON so existing tables need no type change
+        Index("ix_webhooks_events_gin", text("(events::jsonb)"), postgresql_using="gin"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, JSON, Integer, Float, Enum
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, JSON, Integer, Float, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -25,6 +25,12 @@ class WorkflowStepType(enum.Enum):
 
 class Workflow(Base):
     __tablename__ = "workflows"
+    __table_args__ = (
+        # Serves the ordered, limited active-workflow lookup per tenant and domain
+        Index("ix_workflow_domain_active", "tenant_id", "domain", "status", "priority", "execution_count"),
+    )
+    # Fetch server-generated timestamps via RETURNING instead of a refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -53,6 +59,7 @@ class Workflow(Base):
     
     # Performance tracking
     execution_count = Column(Integer, default=0)
+    success_count = Column(Integer, default=0, server_default="0")
     success_rate = Column(Float, default=0.0)
     average_completion_time = Column(Float, default=0.0)
     
@@ -107,6 +114,7 @@ class WorkflowStep(Base):
 
 class WorkflowExecution(Base):
     __tablename__ = "workflow_executions"
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -144,6 +152,7 @@ class WorkflowExecution(Base):
 
 class DomainPromptSet(Base):
     __tablename__ = "domain_prompt_sets"
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -180,6 +189,7 @@ class DomainPromptSet(Base):
 
 class ClientWorkflowConfig(Base):
     __tablename__ = "client_workflow_configs"
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
@@ -105,11 +105,24 @@ class PromptManagementService:
     ) -> Dict[str, Any]:
         """Execute a prompt template with given variables"""
         
+        template = await self.db.get(PromptTemplate, template_id)
+        
+        return await self.execute_prompt_template_with_obj(
+            template, variables, context, template_id=template_id
+        )
+    
+    async def execute_prompt_template_with_obj(
+        self,
+        template: Optional[PromptTemplate],
+        variables: Dict[str, Any],
+        context: Dict[str, Any] = None,
+        template_id: str = None
+    ) -> Dict[str, Any]:
+        """Execute an already loaded prompt template with given variables"""
+        
         start_time = datetime.utcnow()
         
         try:
-            # Get template
-            template = await self.db.get(PromptTemplate, template_id)
             if not template or not template.is_active:
                 raise ValueError("Template not found or inactive")
             
@@ -173,8 +186,8 @@ class PromptManagementService:
             
             # Record failed execution
             execution = PromptExecution(
-                template_id=template_id,
-                tenant_id=template.tenant_id if 'template' in locals() else None,
+                template_id=template.id if template else template_id,
+                tenant_id=template.tenant_id if template else None,
                 input_variables=variables,
                 rendered_prompt=rendered_prompt if 'rendered_prompt' in locals() else "",
                 success=False,
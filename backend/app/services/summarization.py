@@ -1,7 +1,11 @@
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
+from collections import deque
+from dataclasses import dataclass
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, or_, func, case, cast, true, JSON
+from sqlalchemy.orm import aliased, contains_eager
+import asyncio
 import json
 import logging
 import re
@@ -9,14 +13,50 @@ import re
 from app.models import Conversation, ConversationSummary, SummaryTemplate, Message, Tenant
 from app.services.model_router import ModelRouter
 from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.cache import TTLCache
+from app.core.serialization import json_loads
+
+# Extracts a JSON object embedded in free-text model output
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Sentiment keywords for the free-text fallback
+_POSITIVE_RE = re.compile(r'\b(happy|satisfied|good|great)\b', re.IGNORECASE)
+_NEGATIVE_RE = re.compile(r'\b(angry|frustrated|bad|terrible)\b', re.IGNORECASE)
+
+# Structured summary fields: (summary column, JSON key, default, max length)
+_SUMMARY_FIELDS = (
+    ("summary", "summary", "", 1000),
+    ("user_intent", "intent", "", 255),
+    ("resolution_status", "resolution", "unresolved", 50),
+    ("overall_sentiment", "sentiment", "neutral", 20),
+    ("user_satisfaction", "satisfaction", "neutral", 20),
+)
+
+# Transcript characters allowed per output token of the summary template
+_TRANSCRIPT_CHARS_PER_TOKEN = 8
+
+# Per-tenant summarization templates: tenant_id -> template
+_TEMPLATE_CACHE = TTLCache(max_size=1024, ttl_seconds=60.0)
+
+# Transcript labels by message sender; anything else is shown as the agent
+_SENDER_LABELS = {"user": "Customer"}
+
+
+@dataclass(frozen=True)
+class CachedSummaryTemplate:
+    """Session-independent copy of the template fields used for generation"""
+    prompt_template: str
+    max_tokens: int
+    temperature: float
 
 
 class SummarizationService:
     """Service for automatically summarizing conversations"""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, model_router: Optional[ModelRouter] = None):
         self.db = db
-        self.model_router = ModelRouter()
+        self.model_router = model_router or ModelRouter()
     
     async def auto_summarize_conversation(
         self,
@@ -27,7 +67,8 @@ class SummarizationService:
         
         try:
             # Check if conversation should be summarized
-            if not await self._should_summarize_conversation(conversation, force_regenerate):
+            message_count = await self._should_summarize_conversation(conversation, force_regenerate)
+            if message_count is None:
                 return None
             
             # Get or create summary
@@ -35,26 +76,20 @@ class SummarizationService:
             if existing_summary and not force_regenerate:
                 return existing_summary
             
-            # Get conversation messages
-            messages = await self._get_conversation_messages(conversation.id)
-            if len(messages) < 2:  # Need at least user message + bot response
+            if message_count < 2:  # Need at least user message + bot response
                 return None
             
             # Get summarization template
             template = await self._get_summarization_template(conversation.tenant_id)
             
-            # Generate summary
-            summary_data = await self._generate_summary(
-                conversation, messages, template
+            # Get the most recent conversation messages that fit the budget
+            messages = await self._get_conversation_messages(
+                conversation.id, self._transcript_budget(template)
             )
             
-            # Save or update summary
-            if existing_summary:
-                summary = await self._update_summary(existing_summary, summary_data)
-            else:
-                summary = await self._create_summary(conversation, summary_data)
-            
-            return summary
+            return await self._generate_and_persist(
+                conversation, messages, message_count, template, existing_summary
+            )
             
         except Exception as e:
             logging.error(f"Error auto-summarizing conversation {conversation.id}: {e}")
@@ -72,25 +107,84 @@ class SummarizationService:
             # Get conversations that need summarization
             cutoff_time = datetime.utcnow() - timedelta(hours=max_age_hours)
             
+            # Template is tenant-scoped, so it is identical for every row
+            template = await self._get_summarization_template(tenant_id)
+            
+            # Correlated so each count is an indexed lookup for one candidate
+            message_count = (
+                select(func.count(Message.id))
+                .where(Message.conversation_id == Conversation.id)
+                .scalar_subquery()
+            )
+            
+            # Eligibility filters run server-side; existing summaries are
+            # eager-loaded and message counts selected alongside each conversation
             result = await self.db.execute(
-                select(Conversation)
+                select(Conversation, message_count)
+                .outerjoin(ConversationSummary, ConversationSummary.conversation_id == Conversation.id)
+                .options(contains_eager(Conversation.summary))
                 .where(
                     and_(
                         Conversation.tenant_id == tenant_id,
                         Conversation.status.in_(["closed", "handed_over"]),
-                        Conversation.updated_at >= cutoff_time
+                        Conversation.updated_at >= cutoff_time,
+                        message_count >= 3,
+                        or_(
+                            ConversationSummary.id.is_(None),
+                            ConversationSummary.manual_override.is_(True)
+                        )
                     )
                 )
                 .limit(batch_size)
             )
             
-            conversations = result.scalars().all()
-            summaries = []
+            rows = result.all()
+            conversations = [row[0] for row in rows]
+            message_counts = {row[0].id: row[1] for row in rows}
             
-            for conversation in conversations:
-                summary = await self.auto_summarize_conversation(conversation)
-                if summary:
-                    summaries.append(summary)
+            # Only the transcript tails that fit the budget are loaded
+            transcripts = await self._get_transcript_tails(
+                [
+                    conversation.id
+                    for conversation in conversations
+                    if not conversation.summary
+                ],
+                self._transcript_budget(template)
+            )
+            
+            # Generations are I/O-bound LLM calls, so run them concurrently
+            # up to the configured width; each task gets its own session
+            # because AsyncSession must not be shared across tasks
+            semaphore = asyncio.Semaphore(settings.SUMMARY_CONCURRENCY)
+            
+            async def _run(conversation: Conversation) -> ConversationSummary:
+                # Manually overridden summaries are returned as-is, never regenerated
+                if conversation.summary:
+                    return conversation.summary
+                
+                async with semaphore:
+                    async with AsyncSessionLocal() as session:
+                        worker = SummarizationService(session, self.model_router)
+                        
+                        return await worker._generate_and_persist(
+                            conversation,
+                            transcripts.get(conversation.id, []),
+                            message_counts[conversation.id],
+                            template
+                        )
+            
+            results = await asyncio.gather(
+                *[_run(conversation) for conversation in conversations],
+                return_exceptions=True
+            )
+            
+            summaries = []
+            for conversation, result in zip(conversations, results):
+                if isinstance(result, Exception):
+                    logging.error(f"Error auto-summarizing conversation {conversation.id}: {result}")
+                    continue
+                
+                summaries.append(result)
             
             return summaries
             
@@ -129,6 +223,8 @@ class SummarizationService:
         await self.db.commit()
         await self.db.refresh(template)
         
+        _TEMPLATE_CACHE.pop(str(tenant_id))
+        
         return template
     
     async def get_conversation_insights(
@@ -141,32 +237,74 @@ class SummarizationService:
         try:
             start_date = datetime.utcnow() - timedelta(days=days)
             
-            # Get summaries for analysis
-            result = await self.db.execute(
-                select(ConversationSummary)
-                .join(Conversation, ConversationSummary.conversation_id == Conversation.id)
-                .where(
-                    and_(
-                        Conversation.tenant_id == tenant_id,
-                        ConversationSummary.created_at >= start_date
-                    )
+            filters = and_(
+                Conversation.tenant_id == tenant_id,
+                ConversationSummary.created_at >= start_date
+            )
+            
+            topics = func.json_array_elements_text(
+                case(
+                    (func.json_typeof(ConversationSummary.key_topics) == "array", ConversationSummary.key_topics),
+                    else_=cast([], JSON)
                 )
+            ).table_valued("value").lateral()
+            
+            languages = func.json_array_elements_text(
+                case(
+                    (ConversationSummary.languages_detected.is_(None), cast(["en"], JSON)),
+                    (func.json_typeof(ConversationSummary.languages_detected) != "array", cast(["en"], JSON)),
+                    (func.json_array_length(ConversationSummary.languages_detected) == 0, cast(["en"], JSON)),
+                    else_=ConversationSummary.languages_detected
+                )
+            ).table_valued("value").lateral()
+            
+            # Histograms are aggregated server-side, each on its own session
+            # so the queries can run concurrently
+            (
+                sentiments,
+                resolutions,
+                intents,
+                satisfactions,
+                topic_counts,
+                language_counts
+            ) = await asyncio.gather(
+                self._count_summaries_by(
+                    func.coalesce(ConversationSummary.overall_sentiment, "neutral"), filters
+                ),
+                self._count_summaries_by(
+                    func.coalesce(ConversationSummary.resolution_status, "unresolved"), filters
+                ),
+                self._count_summaries_by(
+                    func.coalesce(ConversationSummary.user_intent, "unknown"), filters, limit=10
+                ),
+                self._count_summaries_by(
+                    func.coalesce(ConversationSummary.user_satisfaction, "neutral"), filters
+                ),
+                self._count_summaries_by(topics.c.value, filters, limit=10, lateral=topics),
+                self._count_summaries_by(languages.c.value, filters, lateral=languages)
             )
             
-            summaries = result.scalars().all()
+            # Every summary falls into exactly one sentiment bucket
+            total = sum(sentiments.values())
             
-            if not summaries:
+            if not total:
                 return {"total_summaries": 0}
             
             # Analyze summaries
             insights = {
-                "total_summaries": len(summaries),
-                "sentiment_distribution": self._analyze_sentiment_distribution(summaries),
-                "top_topics": self._extract_top_topics(summaries),
-                "resolution_rates": self._analyze_resolution_rates(summaries),
-                "common_intents": self._analyze_common_intents(summaries),
-                "average_satisfaction": self._calculate_average_satisfaction(summaries),
-                "language_distribution": self._analyze_language_distribution(summaries)
+                "total_summaries": total,
+                "sentiment_distribution": sentiments,
+                "top_topics": [
+                    {"topic": topic, "count": count}
+                    for topic, count in topic_counts.items()
+                ],
+                "resolution_rates": self._analyze_resolution_rates(resolutions, total),
+                "common_intents": [
+                    {"intent": intent, "count": count}
+                    for intent, count in intents.items()
+                ],
+                "average_satisfaction": self._calculate_average_satisfaction(satisfactions, total),
+                "language_distribution": language_counts
             }
             
             return insights
@@ -175,36 +313,66 @@ class SummarizationService:
             logging.error(f"Error getting conversation insights: {e}")
             return {"error": str(e)}
     
+    async def _count_summaries_by(
+        self,
+        bucket,
+        filters,
+        limit: Optional[int] = None,
+        lateral=None
+    ) -> Dict[str, int]:
+        """Count summaries per bucket with a GROUP BY, most common first"""
+        
+        count = func.count().label("count")
+        query = (
+            select(bucket.label("bucket"), count)
+            .select_from(ConversationSummary)
+            .join(Conversation, ConversationSummary.conversation_id == Conversation.id)
+        )
+        
+        if lateral is not None:
+            query = query.join(lateral, true())
+        
+        query = query.where(filters).group_by(bucket).order_by(count.desc())
+        
+        if limit:
+            query = query.limit(limit)
+        
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(query)
+            return {row.bucket: row.count for row in result}
+    
     async def _should_summarize_conversation(
         self,
         conversation: Conversation,
         force_regenerate: bool = False
-    ) -> bool:
-        """Determine if a conversation should be summarized"""
+    ) -> Optional[int]:
+        """Determine if a conversation should be summarized
         
-        if force_regenerate:
-            return True
+        Returns the conversation's total message count if so, else None.
+        """
         
-        # Check if conversation is in a summarizable state
-        if conversation.status not in ["closed", "handed_over"]:
-            return False
+        if not force_regenerate:
+            # Check if conversation is in a summarizable state
+            if conversation.status not in ["closed", "handed_over"]:
+                return None
+            
+            # Check if summary already exists; the common re-ingestion case,
+            # so it goes before the more expensive message count
+            existing_summary = await self._get_existing_summary(conversation.id)
+            if existing_summary and not existing_summary.manual_override:
+                return None
         
-        # Check minimum message count
         message_count_result = await self.db.execute(
             select(func.count(Message.id))
             .where(Message.conversation_id == conversation.id)
         )
         message_count = message_count_result.scalar() or 0
         
-        if message_count < 3:  # Need meaningful conversation
-            return False
-        
-        # Check if summary already exists
-        existing_summary = await self._get_existing_summary(conversation.id)
-        if existing_summary and not existing_summary.manual_override:
-            return False
+        # Check minimum message count
+        if not force_regenerate and message_count < 3:  # Need meaningful conversation
+            return None
         
-        return True
+        return message_count
     
     async def _get_existing_summary(
         self,
@@ -221,24 +389,94 @@ class SummarizationService:
     
     async def _get_conversation_messages(
         self,
-        conversation_id: str
+        conversation_id: str,
+        max_chars: Optional[int] = None
     ) -> List[Message]:
-        """Get all messages for a conversation"""
+        """Get the most recent messages for a conversation, oldest first
         
-        result = await self.db.execute(
+        Messages are streamed newest-first and reading stops once
+        ``max_chars`` of content has been collected, so long conversations
+        are never fully materialized.
+        """
+        
+        result = await self.db.stream_scalars(
             select(Message)
             .where(Message.conversation_id == conversation_id)
-            .order_by(Message.created_at)
+            .order_by(Message.created_at.desc())
         )
         
-        return result.scalars().all()
+        messages = deque()
+        total_chars = 0
+        
+        async for message in result:
+            total_chars += len(message.content)
+            if max_chars is not None and total_chars > max_chars and messages:
+                break
+            messages.appendleft(message)
+        
+        await result.close()
+        
+        return list(messages)
+    
+    async def _get_transcript_tails(
+        self,
+        conversation_ids: List[Any],
+        max_chars: int
+    ) -> Dict[Any, List[Message]]:
+        """Get the most recent messages of several conversations in one query, oldest first
+        
+        Per conversation, the newest message is always kept and older ones
+        are kept while the running content length stays within ``max_chars``,
+        as in _get_conversation_messages.
+        """
+        
+        if not conversation_ids:
+            return {}
+        
+        newest_first = (Message.created_at.desc(), Message.id.desc())
+        ranked = (
+            select(
+                Message,
+                func.sum(func.length(Message.content)).over(
+                    partition_by=Message.conversation_id, order_by=newest_first
+                ).label("running_chars"),
+                func.row_number().over(
+                    partition_by=Message.conversation_id, order_by=newest_first
+                ).label("position")
+            )
+            .where(Message.conversation_id.in_(conversation_ids))
+            .subquery()
+        )
+        ranked_message = aliased(Message, ranked)
+        
+        result = await self.db.execute(
+            select(ranked_message)
+            .where(or_(ranked.c.running_chars <= max_chars, ranked.c.position == 1))
+            .order_by(ranked.c.conversation_id, ranked.c.created_at)
+        )
+        
+        transcripts: Dict[Any, List[Message]] = {}
+        for message in result.scalars():
+            transcripts.setdefault(message.conversation_id, []).append(message)
+        
+        return transcripts
+    
+    def _transcript_budget(self, template: CachedSummaryTemplate) -> int:
+        """Character budget for the transcript sent with a template"""
+        
+        return (template.max_tokens or 500) * _TRANSCRIPT_CHARS_PER_TOKEN
     
     async def _get_summarization_template(
         self,
         tenant_id: str
-    ) -> SummaryTemplate:
+    ) -> CachedSummaryTemplate:
         """Get the best summarization template for a tenant"""
         
+        cache_key = str(tenant_id)
+        cached = _TEMPLATE_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Try to get tenant-specific template
         result = await self.db.execute(
             select(SummaryTemplate)
@@ -249,15 +487,23 @@ class SummarizationService:
                 )
             )
             .order_by(SummaryTemplate.priority.desc(), SummaryTemplate.is_default.desc())
+            .limit(1)
         )
         
         template = result.scalar_one_or_none()
         
-        if template:
-            return template
+        if not template:
+            # Create default template if none exists
+            template = await self._create_default_template(tenant_id)
+        
+        cached_template = CachedSummaryTemplate(
+            prompt_template=template.prompt_template,
+            max_tokens=template.max_tokens,
+            temperature=template.temperature
+        )
+        _TEMPLATE_CACHE.set(cache_key, cached_template)
         
-        # Create default template if none exists
-        return await self._create_default_template(tenant_id)
+        return cached_template
     
     async def _create_default_template(self, tenant_id: str) -> SummaryTemplate:
         """Create a default summarization template"""
@@ -303,11 +549,35 @@ class SummarizationService:
         
         return template
     
+    async def _generate_and_persist(
+        self,
+        conversation: Conversation,
+        messages: List[Message],
+        message_count: int,
+        template: CachedSummaryTemplate,
+        existing_summary: Optional[ConversationSummary] = None
+    ) -> ConversationSummary:
+        """Generate a summary for already-loaded messages and save it
+        
+        ``messages`` may be trimmed to the transcript budget;
+        ``message_count`` is the conversation's full message count.
+        """
+        
+        summary_data = await self._generate_summary(
+            conversation, messages, message_count, template
+        )
+        
+        if existing_summary:
+            return await self._update_summary(existing_summary, summary_data)
+        
+        return await self._create_summary(conversation, summary_data)
+    
     async def _generate_summary(
         self,
         conversation: Conversation,
         messages: List[Message],
-        template: SummaryTemplate
+        message_count: int,
+        template: CachedSummaryTemplate
     ) -> Dict[str, Any]:
         """Generate summary using AI model"""
         
@@ -333,7 +603,7 @@ class SummarizationService:
             # Parse AI response
             summary_data = self._parse_ai_summary_response(
                 response["content"],
-                len(messages),
+                message_count,
                 conversation
             )
             
@@ -345,26 +615,21 @@ class SummarizationService:
         except Exception as e:
             logging.error(f"Error generating summary: {e}")
             # Return fallback summary
-            return self._create_fallback_summary(messages, conversation)
+            return self._create_fallback_summary(message_count, conversation)
     
     def _build_conversation_text(self, messages: List[Message]) -> str:
         """Build formatted conversation text for AI analysis"""
         
-        conversation_lines = []
+        return "\n".join(self._format_line(message) for message in messages)
+    
+    def _format_line(self, message: Message) -> str:
+        """Format a single message as a transcript line"""
         
-        for message in messages:
-            sender = "Customer" if message.sender == "user" else "Agent"
-            timestamp = message.created_at.strftime("%H:%M")
-            
-            line = f"[{timestamp}] {sender}: {message.content}"
-            
-            if message.media_url:
-                media_type = message.media_type or "media"
-                line += f" [Shared {media_type}]"
-            
-            conversation_lines.append(line)
+        sent_at = message.created_at
+        sender = _SENDER_LABELS.get(message.sender, "Agent")
+        media = f" [Shared {message.media_type or 'media'}]" if message.media_url else ""
         
-        return "\n".join(conversation_lines)
+        return f"[{sent_at.hour:02d}:{sent_at.minute:02d}] {sender}: {message.content}{media}"
     
     def _parse_ai_summary_response(
         self,
@@ -374,35 +639,49 @@ class SummarizationService:
     ) -> Dict[str, Any]:
         """Parse AI response into structured summary data"""
         
+        duration_minutes = self._calculate_conversation_duration(conversation)
+        
         try:
-            # Try to extract JSON from response
-            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-            if json_match:
-                summary_json = json.loads(json_match.group())
-                
-                return {
-                    "summary": summary_json.get("summary", "")[:1000],  # Limit length
-                    "key_topics": summary_json.get("topics", [])[:5],  # Max 5 topics
-                    "user_intent": summary_json.get("intent", "")[:255],
-                    "resolution_status": summary_json.get("resolution", "unresolved"),
-                    "overall_sentiment": summary_json.get("sentiment", "neutral"),
-                    "user_satisfaction": summary_json.get("satisfaction", "neutral"),
-                    "message_count": message_count,
-                    "duration_minutes": self._calculate_conversation_duration(conversation),
-                    "summary_confidence": 0.8,  # High confidence for structured response
-                    "auto_generated": True
+            summary_json = self._load_summary_json(ai_response)
+            if summary_json is not None:
+                summary_data = {
+                    field: str(summary_json.get(key) or default)[:max_length]
+                    for field, key, default, max_length in _SUMMARY_FIELDS
                 }
+                
+                topics = summary_json.get("topics")
+                summary_data["key_topics"] = topics[:5] if isinstance(topics, list) else []  # Max 5 topics
+                summary_data["message_count"] = message_count
+                summary_data["duration_minutes"] = duration_minutes
+                summary_data["summary_confidence"] = 0.8  # High confidence for structured response
+                summary_data["auto_generated"] = True
+                
+                return summary_data
         except (json.JSONDecodeError, KeyError) as e:
             logging.warning(f"Failed to parse AI summary JSON: {e}")
         
         # Fallback: extract information from free text
-        return self._extract_summary_from_text(ai_response, message_count, conversation)
+        return self._extract_summary_from_text(ai_response, message_count, duration_minutes)
+    
+    def _load_summary_json(self, ai_response: str) -> Optional[Dict[str, Any]]:
+        """Load the JSON object from an AI response, if there is one"""
+        
+        # Fast path: most models return pure JSON, no scan needed
+        try:
+            summary_json = json_loads(ai_response.strip())
+        except json.JSONDecodeError:
+            json_match = _JSON_RE.search(ai_response)
+            if not json_match:
+                return None
+            summary_json = json_loads(json_match.group())
+        
+        return summary_json if isinstance(summary_json, dict) else None
     
     def _extract_summary_from_text(
         self,
         text: str,
         message_count: int,
-        conversation: Conversation
+        duration_minutes: Optional[int]
     ) -> Dict[str, Any]:
         """Extract summary information from free text response"""
         
@@ -411,9 +690,9 @@ class SummarizationService:
         
         # Basic sentiment detection
         sentiment = "neutral"
-        if any(word in text.lower() for word in ["happy", "satisfied", "good", "great"]):
+        if _POSITIVE_RE.search(text):
             sentiment = "positive"
-        elif any(word in text.lower() for word in ["angry", "frustrated", "bad", "terrible"]):
+        elif _NEGATIVE_RE.search(text):
             sentiment = "negative"
         
         return {
@@ -424,26 +703,26 @@ class SummarizationService:
             "overall_sentiment": sentiment,
             "user_satisfaction": "neutral",
             "message_count": message_count,
-            "duration_minutes": self._calculate_conversation_duration(conversation),
+            "duration_minutes": duration_minutes,
             "summary_confidence": 0.4,  # Lower confidence for unstructured response
             "auto_generated": True
         }
     
     def _create_fallback_summary(
         self,
-        messages: List[Message],
+        message_count: int,
         conversation: Conversation
     ) -> Dict[str, Any]:
         """Create a basic fallback summary when AI fails"""
         
         return {
-            "summary": f"Conversation with {len(messages)} messages via {conversation.channel}",
+            "summary": f"Conversation with {message_count} messages via {conversation.channel}",
             "key_topics": [],
             "user_intent": "general_inquiry",
             "resolution_status": "unresolved",
             "overall_sentiment": "neutral",
             "user_satisfaction": "neutral",
-            "message_count": len(messages),
+            "message_count": message_count,
             "duration_minutes": self._calculate_conversation_duration(conversation),
             "summary_confidence": 0.2,  # Low confidence for fallback
             "auto_generated": True
@@ -493,34 +772,8 @@ class SummarizationService:
         return existing_summary
     
     # Insight analysis methods
-    def _analyze_sentiment_distribution(self, summaries: List[ConversationSummary]) -> Dict[str, int]:
-        """Analyze sentiment distribution"""
-        sentiments = {}
-        for summary in summaries:
-            sentiment = summary.overall_sentiment or "neutral"
-            sentiments[sentiment] = sentiments.get(sentiment, 0) + 1
-        return sentiments
-    
-    def _extract_top_topics(self, summaries: List[ConversationSummary]) -> List[Dict[str, Any]]:
-        """Extract top topics from summaries"""
-        topic_counts = {}
-        for summary in summaries:
-            for topic in summary.key_topics or []:
-                topic_counts[topic] = topic_counts.get(topic, 0) + 1
-        
-        return [
-            {"topic": topic, "count": count}
-            for topic, count in sorted(topic_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-        ]
-    
-    def _analyze_resolution_rates(self, summaries: List[ConversationSummary]) -> Dict[str, Any]:
+    def _analyze_resolution_rates(self, resolutions: Dict[str, int], total: int) -> Dict[str, Any]:
         """Analyze resolution rates"""
-        resolutions = {}
-        for summary in summaries:
-            status = summary.resolution_status or "unresolved"
-            resolutions[status] = resolutions.get(status, 0) + 1
-        
-        total = len(summaries)
         resolved = resolutions.get("resolved", 0)
         resolution_rate = (resolved / total * 100) if total > 0 else 0
         
@@ -529,26 +782,8 @@ class SummarizationService:
             "breakdown": resolutions
         }
     
-    def _analyze_common_intents(self, summaries: List[ConversationSummary]) -> List[Dict[str, Any]]:
-        """Analyze common user intents"""
-        intents = {}
-        for summary in summaries:
-            intent = summary.user_intent or "unknown"
-            intents[intent] = intents.get(intent, 0) + 1
-        
-        return [
-            {"intent": intent, "count": count}
-            for intent, count in sorted(intents.items(), key=lambda x: x[1], reverse=True)[:10]
-        ]
-    
-    def _calculate_average_satisfaction(self, summaries: List[ConversationSummary]) -> Dict[str, Any]:
+    def _calculate_average_satisfaction(self, satisfactions: Dict[str, int], total: int) -> Dict[str, Any]:
         """Calculate average satisfaction metrics"""
-        satisfactions = {}
-        for summary in summaries:
-            satisfaction = summary.user_satisfaction or "neutral"
-            satisfactions[satisfaction] = satisfactions.get(satisfaction, 0) + 1
-        
-        total = len(summaries)
         satisfied = satisfactions.get("satisfied", 0)
         satisfaction_rate = (satisfied / total * 100) if total > 0 else 0
         
@@ -556,11 +791,3 @@ class SummarizationService:
             "satisfaction_rate_percent": round(satisfaction_rate, 1),
             "breakdown": satisfactions
         }
-    
-    def _analyze_language_distribution(self, summaries: List[ConversationSummary]) -> Dict[str, int]:
-        """Analyze language distribution"""
-        languages = {}
-        for summary in summaries:
-            for lang in summary.languages_detected or ["en"]:
-                languages[lang] = languages.get(lang, 0) + 1
-        return languages
\ No newline at end of file
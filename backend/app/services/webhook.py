@@ -1,15 +1,45 @@
 import httpx
-import json
 import logging
-import hashlib
 import hmac
 import asyncio
-from typing import Dict, Any, Optional
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, case, cast
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 
 from app.models import Webhook, Tenant, Conversation, Message
+from app.core.serialization import json_dumps
+
+# Shared across service instances so connections (and TLS sessions) are
+# pooled and reused between requests instead of per WebhookService; created
+# lazily so it can be recreated after a shutdown closed it
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Shared HTTP client for webhook deliveries"""
+    global _CLIENT
+    
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+        )
+    
+    return _CLIENT
+
+# Exponential retry schedule (seconds) with full jitter applied per attempt
+_BACKOFF = tuple(2 ** i for i in range(8))
+
+# Deliveries are awaited inline by message processing, so retries must stay
+# short: a cap per wait and a budget for all waits of one delivery
+_MAX_RETRY_DELAY = 4.0
+_MAX_TOTAL_RETRY_DELAY = 10.0
 
 
 class WebhookService:
@@ -17,7 +47,7 @@ class WebhookService:
     
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = _get_client()
     
     async def trigger_webhook(
         self,
@@ -32,8 +62,30 @@ class WebhookService:
             # Get active webhooks for this tenant
             webhooks = await self._get_tenant_webhooks(tenant_id, event_type)
             
-            for webhook in webhooks:
-                await self._send_webhook(webhook, event_type, payload)
+            webhook_payload = {
+                "event": event_type,
+                "timestamp": payload.get("timestamp"),
+                "data": payload
+            }
+            
+            # The body is identical for every subscriber, so serialize it once
+            body = json_dumps(webhook_payload)
+            
+            # Deliveries are independent, so fan them out concurrently
+            results = await asyncio.gather(
+                *[self._send_webhook(webhook, body) for webhook in webhooks],
+                return_exceptions=True
+            )
+            
+            outcomes = []
+            for webhook, result in zip(webhooks, results):
+                if isinstance(result, Exception):
+                    logging.error(f"Error sending webhook {webhook.id}: {result}")
+                    result = {"id": webhook.id, "success": False, "error": str(result)}
+                outcomes.append(result)
+            
+            if outcomes:
+                await self._update_webhook_stats(outcomes)
                 
         except Exception as e:
             logging.error(f"Error triggering webhooks: {e}")
@@ -44,34 +96,20 @@ class WebhookService:
         result = await self.db.execute(
             select(Webhook).where(
                 Webhook.tenant_id == tenant_id,
-                Webhook.is_active == True
+                Webhook.is_active == True,
+                cast(Webhook.events, JSONB).contains([event_type])
             )
         )
         
-        webhooks = result.scalars().all()
-        
-        # Filter by event type
-        matching_webhooks = []
-        for webhook in webhooks:
-            if event_type in webhook.events:
-                matching_webhooks.append(webhook)
-        
-        return matching_webhooks
+        return result.scalars().all()
     
     async def _send_webhook(
         self,
         webhook: Webhook,
-        event_type: str,
-        payload: Dict[str, Any]
+        body: bytes
     ):
         """Send individual webhook with retry logic"""
         
-        webhook_payload = {
-            "event": event_type,
-            "timestamp": payload.get("timestamp"),
-            "data": payload
-        }
-        
         headers = {
             "Content-Type": "application/json",
             "User-Agent": "ComChat-Webhook/1.0",
@@ -80,10 +118,7 @@ class WebhookService:
         
         # Add webhook signature if secret is configured
         if webhook.secret:
-            signature = self._generate_signature(
-                webhook.secret,
-                json.dumps(webhook_payload, separators=(',', ':'))
-            )
+            signature = self._generate_signature(webhook.secret, body)
             headers["X-ComChat-Signature"] = f"sha256={signature}"
         
         # Add authentication headers
@@ -100,12 +135,17 @@ class WebhookService:
         # Send webhook with retries
         success = False
         last_error = None
+        total_delay = 0.0
+        attempts = 0
         
         for attempt in range(webhook.retry_count + 1):
+            attempts += 1
+            retry_after = None
+            
             try:
                 response = await self.client.post(
                     webhook.url,
-                    json=webhook_payload,
+                    content=body,
                     headers=headers,
                     timeout=webhook.timeout_seconds
                 )
@@ -115,33 +155,83 @@ class WebhookService:
                     break
                 else:
                     last_error = f"HTTP {response.status_code}: {response.text}"
+                    retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
                     
             except Exception as e:
                 last_error = str(e)
                 
             if attempt < webhook.retry_count:
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff
-        
-        # Update webhook statistics
-        webhook.total_calls += 1
-        if success:
-            webhook.successful_calls += 1
-            webhook.last_error = None
-        else:
-            webhook.failed_calls += 1
-            webhook.last_error = last_error
-            logging.error(f"Webhook failed after {webhook.retry_count + 1} attempts: {last_error}")
-        
-        webhook.last_called_at = func.now()
+                delay = self._retry_delay(attempt, retry_after)
+                if total_delay + delay > _MAX_TOTAL_RETRY_DELAY:
+                    break
+                
+                total_delay += delay
+                await asyncio.sleep(delay)
+        
+        if not success:
+            logging.error(f"Webhook failed after {attempts} attempts: {last_error}")
+        
+        return {"id": webhook.id, "success": success, "error": last_error}
+    
+    async def _update_webhook_stats(self, outcomes: List[Dict[str, Any]]):
+        """Record delivery statistics for a fan-out in one UPDATE and commit"""
+        
+        succeeded = [outcome["id"] for outcome in outcomes if outcome["success"]]
+        errors = {
+            outcome["id"]: outcome["error"]
+            for outcome in outcomes
+            if not outcome["success"]
+        }
+        
+        await self.db.execute(
+            update(Webhook)
+            .where(Webhook.id.in_([outcome["id"] for outcome in outcomes]))
+            .values(
+                total_calls=Webhook.total_calls + 1,
+                successful_calls=Webhook.successful_calls + case(
+                    (Webhook.id.in_(succeeded), 1), else_=0
+                ),
+                failed_calls=Webhook.failed_calls + case(
+                    (Webhook.id.in_(succeeded), 0), else_=1
+                ),
+                last_error=case(errors, value=Webhook.id, else_=None) if errors else None,
+                last_called_at=func.now()
+            )
+            .execution_options(synchronize_session=False)
+        )
         await self.db.commit()
     
-    def _generate_signature(self, secret: str, payload: str) -> str:
+    def _retry_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before the next attempt, honoring the server's Retry-After"""
+        
+        if retry_after is not None:
+            return min(retry_after, _MAX_RETRY_DELAY)
+        
+        # Jitter keeps concurrent retries against a flaky endpoint from synchronizing
+        delay = _BACKOFF[min(attempt, len(_BACKOFF) - 1)]
+        return min(delay * (0.5 + random.random()), _MAX_RETRY_DELAY)
+    
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given as seconds or an HTTP date"""
+        
+        if not value:
+            return None
+        
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    
+    def _generate_signature(self, secret: str, payload: bytes) -> str:
         """Generate HMAC SHA256 signature for webhook verification"""
-        return hmac.new(
-            secret.encode('utf-8'),
-            payload.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+        return hmac.digest(secret.encode('utf-8'), payload, 'sha256').hex()
     
     async def create_webhook_events(
         self,
@@ -183,6 +273,12 @@ class WebhookService:
         )
 
 
+async def close_webhook_client():
+    """Close the shared webhook HTTP client on application shutdown"""
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+
+
 # Webhook event types
 class WebhookEvents:
     MESSAGE_RECEIVED = "message.received"
@@ -1,16 +1,29 @@
-from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet, Set, Callable
+from dataclasses import dataclass
+from collections import ChainMap
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, update
+from sqlalchemy import select, insert, and_, func, update, cast, Float, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
+import aiohttp
 import asyncio
+import hashlib
 import json
 import logging
+import numpy as np
+import operator
+import re
+import time
+import uuid
 from enum import Enum
 
-from app.models import Workflow, WorkflowStep, WorkflowExecution, DomainPromptSet, ClientWorkflowConfig
+from app.models import Workflow, WorkflowStep, WorkflowExecution, DomainPromptSet, ClientWorkflowConfig, PromptTemplate
 from app.models.workflow import WorkflowStatus, WorkflowStepType
 from app.services.prompt_management import PromptManagementService
 from app.services.model_router import ModelRouter
+from app.core.cache import TTLCache
+from app.core.serialization import json_dumps, json_loads
 
 
 class ExecutionStatus(Enum):
@@ -21,6 +34,107 @@ class ExecutionStatus(Enum):
     PAUSED = "paused"
 
 
+@dataclass(frozen=True, slots=True)
+class PayloadTemplate:
+    """Webhook payload compiled once: serialized skeleton plus parameterized leaves"""
+    skeleton: bytes
+    # (path into the payload, renderer over the context) for each templated leaf
+    parameters: Tuple[Tuple[Tuple[Any, ...], Callable[[Dict[str, Any]], Any]], ...]
+
+
+@dataclass(frozen=True, slots=True)
+class StepSpec:
+    """Immutable, session-independent snapshot of a workflow step"""
+    id: uuid.UUID
+    name: str
+    step_type: WorkflowStepType
+    order_index: int
+    config: Dict[str, Any]
+    input_mapping: Dict[str, Any]
+    output_mapping: Dict[str, Any]
+    next_step_conditions: List[Any]
+    timeout_seconds: int
+    retry_config: Dict[str, Any]
+    prompt_template_id: Optional[uuid.UUID]
+    # Top-level context keys read/written by the step; None means unknown (any key)
+    consumes: Optional[FrozenSet[str]]
+    produces: Optional[FrozenSet[str]]
+    # Condition steps: (condition, predicate over the context) in evaluation order
+    compiled_conditions: Tuple[Tuple[Dict[str, Any], Callable[[Dict[str, Any]], bool]], ...]
+    # Webhook steps: payload with its context references resolved up front
+    payload_template: Optional[PayloadTemplate]
+    # set_variable action steps: pre-split context path of the value, None for literals
+    value_path: Optional[Tuple[str, ...]]
+    # (target step id, predicate over the context) for each next_step_conditions entry
+    compiled_next_steps: Tuple[Tuple[str, Callable[[Dict[str, Any]], bool]], ...]
+
+
+# Condition operators by name; unknown operators never match
+_CONDITION_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "equals": operator.eq,
+    "not_equals": operator.ne,
+    "greater_than": operator.gt,
+    "less_than": operator.lt,
+    "contains": lambda left, right: right in str(left),
+    "starts_with": lambda left, right: str(left).startswith(str(right)),
+    "ends_with": lambda left, right: str(left).endswith(str(right)),
+}
+
+
+# {{name}} placeholders in webhook payload strings; names may be context paths
+_PLACEHOLDER_RE = re.compile(r'\{\{\s*([^}]+?)\s*\}\}')
+
+
+def _resolve_context_path(context: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    """Value at a pre-split context path, or None if any key is missing"""
+    value = context
+    for key in path:
+        if isinstance(value, (dict, ChainMap)) and key in value:
+            value = value[key]
+        else:
+            return None
+    return value
+
+
+# Steps are immutable per workflow version: (workflow_id, version) -> steps
+_STEPS_CACHE = TTLCache(max_size=1024)
+
+# Client custom workflow names: (tenant_id, domain) -> names
+_CUSTOM_WORKFLOWS_CACHE = TTLCache(max_size=1024, ttl_seconds=60.0)
+
+# Prompt step results by input hash: key -> prompt result
+_PROMPT_RESULT_CACHE = TTLCache(max_size=4096, ttl_seconds=3600.0)
+
+# Input variables whose values differ on every run, making results uncacheable
+_VOLATILE_PROMPT_VARIABLES = frozenset({"timestamp", "request_id"})
+
+# Highest-priority workflows per domain considered for relevance scoring
+_WORKFLOW_SHORTLIST_SIZE = 20
+
+# Executed steps between crash-recovery commits of execution progress
+_CHECKPOINT_EVERY_STEPS = 10
+
+# Upper bound on the backoff between retries of a failed step
+_MAX_STEP_RETRY_DELAY_SECONDS = 30.0
+
+# Shared across engine instances so webhook steps reuse pooled keep-alive
+# connections; created lazily because aiohttp needs a running event loop
+_HTTP_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+def _get_http_session() -> aiohttp.ClientSession:
+    """Shared HTTP session for webhook steps"""
+    global _HTTP_SESSION
+    
+    if _HTTP_SESSION is None or _HTTP_SESSION.closed:
+        _HTTP_SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+    
+    return _HTTP_SESSION
+
+
 class WorkflowEngine:
     """Service for executing and managing workflows"""
     
@@ -28,6 +142,18 @@ class WorkflowEngine:
         self.db = db
         self.prompt_service = PromptManagementService(db)
         self.model_router = ModelRouter()
+        
+        # Prompt templates loaded in this engine's session, by id
+        self._prompt_templates: Dict[uuid.UUID, PromptTemplate] = {}
+        
+        # Step executors by type, all called as (step, context, execution)
+        self._step_handlers = {
+            WorkflowStepType.PROMPT: self._execute_prompt_step,
+            WorkflowStepType.CONDITION: lambda step, context, execution: self._execute_condition_step(step, context),
+            WorkflowStepType.ACTION: lambda step, context, execution: self._execute_action_step(step, context),
+            WorkflowStepType.DELAY: lambda step, context, execution: self._execute_delay_step(step, context),
+            WorkflowStepType.WEBHOOK: lambda step, context, execution: self._execute_webhook_step(step, context),
+        }
     
     async def create_workflow(
         self,
@@ -57,11 +183,10 @@ class WorkflowEngine:
             
             self.db.add(workflow)
             await self.db.commit()
-            await self.db.refresh(workflow)
             
             # Create workflow steps
             if "step_definitions" in config:
-                await self._create_workflow_steps(workflow.id, config["step_definitions"])
+                await self._create_workflow_steps(workflow, config["step_definitions"])
             
             return workflow
             
@@ -79,7 +204,7 @@ class WorkflowEngine:
     ) -> Dict[str, Any]:
         """Execute a workflow with given context"""
         
-        start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         
         try:
             # Get workflow and validate
@@ -100,10 +225,10 @@ class WorkflowEngine:
             
             self.db.add(execution)
             await self.db.commit()
-            await self.db.refresh(execution)
             
             # Get workflow steps
-            steps = await self._get_workflow_steps(workflow.id)
+            steps = await self._get_workflow_steps(workflow.id, workflow.version)
+            await self._prefetch_prompt_templates(steps)
             
             # Execute workflow
             result = await self._execute_workflow_steps(execution, steps, workflow)
@@ -111,7 +236,7 @@ class WorkflowEngine:
             # Update execution record
             execution.status = ExecutionStatus.COMPLETED.value if result["success"] else ExecutionStatus.FAILED.value
             execution.completed_at = func.now()
-            execution.total_execution_time_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+            execution.total_execution_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             execution.final_output = result["output"]
             
             if not result["success"]:
@@ -144,12 +269,24 @@ class WorkflowEngine:
         """Get available workflows for a domain with relevance scoring"""
         
         try:
-            # Get client-specific configuration
-            client_config = await self._get_client_config(tenant_id, domain)
+            # Get client-specific workflow customizations
+            custom_workflows = await self._get_custom_workflows(tenant_id, domain)
             
             # Get base workflows for domain
             result = await self.db.execute(
                 select(Workflow)
+                .options(load_only(
+                    Workflow.id,
+                    Workflow.name,
+                    Workflow.description,
+                    Workflow.domain,
+                    Workflow.priority,
+                    Workflow.execution_count,
+                    Workflow.success_rate,
+                    Workflow.trigger_conditions,
+                    Workflow.average_completion_time,
+                    Workflow.max_execution_time_minutes
+                ))
                 .where(
                     and_(
                         Workflow.tenant_id == tenant_id,
@@ -158,32 +295,34 @@ class WorkflowEngine:
                     )
                 )
                 .order_by(Workflow.priority.desc(), Workflow.execution_count.desc())
+                .limit(_WORKFLOW_SHORTLIST_SIZE)
             )
             
             workflows = result.scalars().all()
-            workflow_suggestions = []
             
-            for workflow in workflows:
-                # Calculate relevance score
-                score = self._calculate_workflow_relevance(workflow, context, client_config)
-                
-                if score > 0.3:  # Minimum relevance threshold
-                    workflow_suggestions.append({
-                        "workflow_id": str(workflow.id),
-                        "name": workflow.name,
-                        "description": workflow.description,
-                        "domain": workflow.domain,
-                        "relevance_score": score,
-                        "execution_count": workflow.execution_count,
-                        "success_rate": workflow.success_rate,
-                        "estimated_duration_minutes": self._estimate_duration(workflow),
-                        "required_context": self._get_required_context(workflow)
-                    })
+            # Calculate relevance scores for all workflows at once
+            scores = self._calculate_workflow_relevance(workflows, context, custom_workflows)
             
-            # Sort by relevance score
-            workflow_suggestions.sort(key=lambda x: x["relevance_score"], reverse=True)
+            # Sort by relevance score, keeping query order for ties
+            ranked = [i for i in np.argsort(-scores, kind="stable") if scores[i] > 0.3]  # Minimum relevance threshold
             
-            return workflow_suggestions[:5]  # Top 5 suggestions
+            workflow_suggestions = []
+            
+            for i in ranked[:5]:  # Top 5 suggestions
+                workflow = workflows[i]
+                workflow_suggestions.append({
+                    "workflow_id": str(workflow.id),
+                    "name": workflow.name,
+                    "description": workflow.description,
+                    "domain": workflow.domain,
+                    "relevance_score": float(scores[i]),
+                    "execution_count": workflow.execution_count,
+                    "success_rate": workflow.success_rate,
+                    "estimated_duration_minutes": self._estimate_duration(workflow),
+                    "required_context": self._get_required_context(workflow)
+                })
+            
+            return workflow_suggestions
             
         except Exception as e:
             logging.error(f"Error getting domain workflows: {e}")
@@ -214,7 +353,6 @@ class WorkflowEngine:
             
             self.db.add(prompt_set)
             await self.db.commit()
-            await self.db.refresh(prompt_set)
             
             # Auto-create prompt templates and workflows
             await self._deploy_domain_templates(prompt_set)
@@ -275,7 +413,8 @@ class WorkflowEngine:
                 self.db.add(client_config)
             
             await self.db.commit()
-            await self.db.refresh(client_config)
+            
+            _CUSTOM_WORKFLOWS_CACHE.pop((str(tenant_id), domain))
             
             return client_config
             
@@ -286,48 +425,62 @@ class WorkflowEngine:
     async def _execute_workflow_steps(
         self,
         execution: WorkflowExecution,
-        steps: List[WorkflowStep],
+        steps: Tuple[StepSpec, ...],
         workflow: Workflow
     ) -> Dict[str, Any]:
         """Execute all steps in a workflow"""
         
-        context = execution.context_variables.copy()
+        # Step outputs accumulate in front of the untouched initial context
+        context_updates = {}
+        context = ChainMap(context_updates, execution.context_variables)
         steps_log = []
+        persisted_steps = 0
+        strict_order = bool((workflow.error_handling or {}).get("strict_order"))
         
         try:
-            for step in steps:
-                step_start = datetime.utcnow()
-                
-                # Update current step
-                execution.current_step_id = step.id
-                await self.db.commit()
-                
-                # Execute step
-                step_result = await self._execute_step(step, context, execution)
+            step_positions = {step.id: position for position, step in enumerate(steps)}
+            index = 0
+            next_checkpoint = _CHECKPOINT_EVERY_STEPS
+            
+            while index < len(steps):
+                # Independent steps run concurrently as one layer
+                layer = steps[index:self._layer_end(steps, index, strict_order)]
                 
-                step_duration = int((datetime.utcnow() - step_start).total_seconds() * 1000)
+                # Update current step; persisted at checkpoints and on completion
+                execution.current_step_id = layer[0].id
                 
-                # Log step execution
-                step_log = {
-                    "step_id": str(step.id),
-                    "step_name": step.name,
-                    "step_type": step.step_type.value,
-                    "success": step_result["success"],
-                    "duration_ms": step_duration,
-                    "output": step_result.get("output"),
-                    "error": step_result.get("error")
-                }
+                # Execute layer; every step sees the context as of the layer start
+                layer_results = await asyncio.gather(
+                    *[self._execute_timed_step(step, context, execution) for step in layer]
+                )
                 
-                steps_log.append(step_log)
-                execution.execution_log = steps_log
+                # Log every step of the layer, including those after a failed one
+                for step, (step_result, step_duration) in zip(layer, layer_results):
+                    steps_log.append({
+                        "step_id": str(step.id),
+                        "step_name": step.name,
+                        "step_type": step.step_type.value,
+                        "success": step_result["success"],
+                        "duration_ms": step_duration,
+                        "output": step_result.get("output"),
+                        "error": step_result.get("error")
+                    })
                 
-                if not step_result["success"]:
-                    # Handle step failure
-                    if step.retry_config.get("max_retries", 0) > 0:
-                        # Implement retry logic
-                        retry_result = await self._retry_step(step, context, execution)
-                        if retry_result["success"]:
-                            step_result = retry_result
+                for step, (step_result, _) in zip(layer, layer_results):
+                    if not step_result["success"]:
+                        # Handle step failure
+                        if step.retry_config.get("max_retries", 0) > 0:
+                            # Implement retry logic
+                            retry_result = await self._retry_step(step, context, execution)
+                            if retry_result["success"]:
+                                step_result = retry_result
+                            else:
+                                return {
+                                    "success": False,
+                                    "output": {},
+                                    "error": step_result.get("error"),
+                                    "steps_log": steps_log
+                                }
                         else:
                             return {
                                 "success": False,
@@ -335,30 +488,30 @@ class WorkflowEngine:
                                 "error": step_result.get("error"),
                                 "steps_log": steps_log
                             }
-                    else:
-                        return {
-                            "success": False,
-                            "output": {},
-                            "error": step_result.get("error"),
-                            "steps_log": steps_log
-                        }
                 
-                # Update context with step output
-                if "output" in step_result:
-                    context.update(step_result["output"])
+                    # Outputs are merged in declared order, so later steps win as before
+                    if "output" in step_result:
+                        context_updates.update(step_result["output"])
+                
+                index += len(layer)
                 
-                # Check for conditional next steps
-                next_step = self._determine_next_step(step, step_result, steps)
-                if next_step and next_step != steps[steps.index(step) + 1] if steps.index(step) + 1 < len(steps) else None:
-                    # Jump to different step
-                    next_index = next((i for i, s in enumerate(steps) if s.id == next_step.id), None)
-                    if next_index:
-                        steps = steps[next_index:]
-                        continue
+                # Checkpoint progress for crash recovery
+                if len(steps_log) >= next_checkpoint:
+                    persisted_steps = await self._append_execution_log(execution, steps_log, persisted_steps)
+                    await self.db.commit()
+                    next_checkpoint = len(steps_log) + _CHECKPOINT_EVERY_STEPS
+                
+                # Check for conditional next steps; branching steps are always alone in their layer
+                next_step = self._determine_next_step(layer[-1], context, steps)
+                if next_step:
+                    next_index = step_positions.get(next_step.id)
+                    if next_index is not None and next_index != index:
+                        # Jump to different step
+                        index = next_index
             
             return {
                 "success": True,
-                "output": context,
+                "output": dict(context),
                 "steps_log": steps_log
             }
             
@@ -370,28 +523,110 @@ class WorkflowEngine:
                 "error": str(e),
                 "steps_log": steps_log
             }
+        
+        finally:
+            # Remaining log entries are committed with the final execution state
+            await self._append_execution_log(execution, steps_log, persisted_steps)
+    
+    async def _append_execution_log(
+        self,
+        execution: WorkflowExecution,
+        steps_log: List[Dict[str, Any]],
+        persisted_steps: int
+    ) -> int:
+        """Append unwritten step log entries server-side; returns the number persisted"""
+        
+        if persisted_steps >= len(steps_log):
+            return persisted_steps
+        
+        # execution_log is plain JSON, so append as JSONB and cast back
+        await self.db.execute(
+            update(WorkflowExecution)
+            .where(WorkflowExecution.id == execution.id)
+            .values(execution_log=cast(
+                cast(WorkflowExecution.execution_log, JSONB).op("||")(cast(steps_log[persisted_steps:], JSONB)),
+                JSON
+            ))
+            .execution_options(synchronize_session=False)
+        )
+        
+        # Keep the loaded instance in step with the row without marking it dirty
+        set_committed_value(execution, "execution_log", list(steps_log))
+        
+        return len(steps_log)
+    
+    async def _execute_timed_step(
+        self,
+        step: StepSpec,
+        context: Dict[str, Any],
+        execution: WorkflowExecution
+    ) -> Tuple[Dict[str, Any], int]:
+        """Execute a single workflow step and measure its duration in ms"""
+        
+        step_start_ns = time.perf_counter_ns()
+        step_result = await self._execute_step(step, context, execution)
+        step_duration = (time.perf_counter_ns() - step_start_ns) // 1_000_000
+        
+        return step_result, step_duration
+    
+    async def _retry_step(
+        self,
+        step: StepSpec,
+        context: Dict[str, Any],
+        execution: WorkflowExecution
+    ) -> Dict[str, Any]:
+        """Re-run a failed step up to retry_config["max_retries"] times with exponential backoff"""
+        
+        max_retries = step.retry_config.get("max_retries", 0)
+        retry_delay = step.retry_config.get("retry_delay_seconds", 1)
+        step_result = {"success": False, "error": "No retries configured"}
+        
+        for attempt in range(max_retries):
+            await asyncio.sleep(min(retry_delay * 2 ** attempt, _MAX_STEP_RETRY_DELAY_SECONDS))
+            
+            step_result = await self._execute_step(step, context, execution)
+            if step_result["success"]:
+                break
+        
+        return step_result
+    
+    def _determine_next_step(
+        self,
+        step: StepSpec,
+        context: Dict[str, Any],
+        steps: Tuple[StepSpec, ...]
+    ) -> Optional[StepSpec]:
+        """Target of the step's first matching next_step_conditions entry, or None to continue in order
+        
+        Entries are {"next_step_id": ...} with an optional "left"/"operator"/"right"
+        condition over the context, which already holds the step's outputs.
+        """
+        
+        for target_id, predicate in step.compiled_next_steps:
+            if predicate(context):
+                for candidate in steps:
+                    if str(candidate.id) == target_id:
+                        return candidate
+                
+                logging.error(f"Step {step.name} jumps to unknown step {target_id}")
+                return None
+        
+        return None
     
     async def _execute_step(
         self,
-        step: WorkflowStep,
+        step: StepSpec,
         context: Dict[str, Any],
         execution: WorkflowExecution
     ) -> Dict[str, Any]:
         """Execute a single workflow step"""
         
         try:
-            if step.step_type == WorkflowStepType.PROMPT:
-                return await self._execute_prompt_step(step, context, execution)
-            elif step.step_type == WorkflowStepType.CONDITION:
-                return await self._execute_condition_step(step, context)
-            elif step.step_type == WorkflowStepType.ACTION:
-                return await self._execute_action_step(step, context)
-            elif step.step_type == WorkflowStepType.DELAY:
-                return await self._execute_delay_step(step, context)
-            elif step.step_type == WorkflowStepType.WEBHOOK:
-                return await self._execute_webhook_step(step, context)
-            else:
+            handler = self._step_handlers.get(step.step_type)
+            if handler is None:
                 return {"success": False, "error": f"Unknown step type: {step.step_type}"}
+            
+            return await handler(step, context, execution)
                 
         except Exception as e:
             logging.error(f"Error executing step {step.name}: {e}")
@@ -399,7 +634,7 @@ class WorkflowEngine:
     
     async def _execute_prompt_step(
         self,
-        step: WorkflowStep,
+        step: StepSpec,
         context: Dict[str, Any],
         execution: WorkflowExecution
     ) -> Dict[str, Any]:
@@ -418,16 +653,28 @@ class WorkflowEngine:
                 else:
                     input_variables[var_name] = mapping
             
-            # Execute prompt template
-            prompt_result = await self.prompt_service.execute_prompt_template(
-                template_id=str(step.prompt_template_id),
-                variables=input_variables,
-                context={
-                    "conversation_id": execution.conversation_id,
-                    "user_id": execution.user_id,
-                    "workflow_execution_id": str(execution.id)
-                }
-            )
+            # Prompt template, prefetched for this execution
+            template = self._prompt_templates.get(step.prompt_template_id)
+            
+            # Reuse the result of an identical earlier execution if possible
+            cache_key = self._prompt_cache_key(step, template, input_variables)
+            prompt_result = self._get_cached_prompt_result(cache_key) if cache_key else None
+            
+            if prompt_result is None:
+                # Execute prompt template
+                prompt_result = await self.prompt_service.execute_prompt_template_with_obj(
+                    template,
+                    variables=input_variables,
+                    context={
+                        "conversation_id": execution.conversation_id,
+                        "user_id": execution.user_id,
+                        "workflow_execution_id": str(execution.id)
+                    },
+                    template_id=str(step.prompt_template_id)
+                )
+                
+                if cache_key:
+                    self._cache_prompt_result(cache_key, prompt_result)
             
             # Map outputs
             output = {}
@@ -451,22 +698,14 @@ class WorkflowEngine:
     
     async def _execute_condition_step(
         self,
-        step: WorkflowStep,
+        step: StepSpec,
         context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Execute a conditional logic step"""
         
         try:
-            conditions = step.config.get("conditions", [])
-            
-            for condition in conditions:
-                operator = condition.get("operator")
-                left_value = self._get_context_value(condition.get("left"), context)
-                right_value = condition.get("right")
-                
-                result = self._evaluate_condition(left_value, operator, right_value)
-                
-                if result:
+            for condition, predicate in step.compiled_conditions:
+                if predicate(context):
                     return {
                         "success": True,
                         "output": {"condition_result": True, "matched_condition": condition}
@@ -483,7 +722,7 @@ class WorkflowEngine:
     
     async def _execute_action_step(
         self,
-        step: WorkflowStep,
+        step: StepSpec,
         context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Execute an action step"""
@@ -493,7 +732,10 @@ class WorkflowEngine:
             
             if action_type == "set_variable":
                 variable_name = step.config.get("variable_name")
-                variable_value = self._get_context_value(step.config.get("variable_value"), context)
+                if step.value_path is None:
+                    variable_value = step.config.get("variable_value")
+                else:
+                    variable_value = _resolve_context_path(context, step.value_path)
                 
                 return {
                     "success": True,
@@ -513,7 +755,7 @@ class WorkflowEngine:
     
     async def _execute_delay_step(
         self,
-        step: WorkflowStep,
+        step: StepSpec,
         context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Execute a delay step"""
@@ -533,75 +775,166 @@ class WorkflowEngine:
     
     async def _execute_webhook_step(
         self,
-        step: WorkflowStep,
+        step: StepSpec,
         context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Execute a webhook step"""
         
         try:
-            import aiohttp
-            
             webhook_url = step.config.get("webhook_url")
-            payload = step.config.get("payload", {})
             
             # Replace context variables in payload
-            processed_payload = self._process_payload_variables(payload, context)
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(webhook_url, json=processed_payload) as response:
-                    if response.status == 200:
-                        response_data = await response.json()
-                        return {
-                            "success": True,
-                            "output": {"webhook_response": response_data}
-                        }
-                    else:
-                        return {
-                            "success": False,
-                            "error": f"Webhook returned status {response.status}"
-                        }
+            processed_payload = self._process_payload_variables(step.payload_template, context)
+            
+            async with _get_http_session().post(
+                webhook_url,
+                data=json_dumps(processed_payload),
+                headers={"Content-Type": "application/json"}
+            ) as response:
+                if response.status == 200:
+                    response_data = await response.json()
+                    return {
+                        "success": True,
+                        "output": {"webhook_response": response_data}
+                    }
+                else:
+                    return {
+                        "success": False,
+                        "error": f"Webhook returned status {response.status}"
+                    }
                         
         except Exception as e:
             logging.error(f"Error executing webhook step: {e}")
             return {"success": False, "error": str(e)}
     
+    async def _prefetch_prompt_templates(self, steps: Tuple[StepSpec, ...]):
+        """Load every prompt template the steps reference with a single query"""
+        
+        template_ids = {
+            step.prompt_template_id
+            for step in steps
+            if step.step_type == WorkflowStepType.PROMPT
+            and step.prompt_template_id
+            and step.prompt_template_id not in self._prompt_templates
+        }
+        
+        if not template_ids:
+            return
+        
+        result = await self.db.execute(
+            select(PromptTemplate).where(PromptTemplate.id.in_(template_ids))
+        )
+        
+        for template in result.scalars():
+            self._prompt_templates[template.id] = template
+    
+    def _prompt_cache_key(
+        self,
+        step: StepSpec,
+        template: Optional[PromptTemplate],
+        input_variables: Dict[str, Any]
+    ) -> Optional[str]:
+        """Content hash of a prompt step's template and inputs, or None if it must not be cached"""
+        
+        # Missing or inactive templates always go through the prompt service,
+        # which owns the error handling for them
+        if template is None or not template.is_active:
+            return None
+        
+        if step.config.get("no_cache") or _VOLATILE_PROMPT_VARIABLES.intersection(input_variables):
+            return None
+        
+        digest = hashlib.blake2b(digest_size=32)
+        digest.update(str(step.prompt_template_id).encode("utf-8"))
+        digest.update(json.dumps(
+            [
+                template.version,
+                template.preferred_model,
+                template.model_parameters,
+                template.template_content
+            ],
+            sort_keys=True,
+            default=str
+        ).encode("utf-8"))
+        digest.update(json.dumps(input_variables, sort_keys=True, default=str).encode("utf-8"))
+        
+        return digest.hexdigest()
+    
+    def _get_cached_prompt_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Get a memoized prompt result that has not expired"""
+        
+        cached = _PROMPT_RESULT_CACHE.get(cache_key)
+        if cached is None:
+            return None
+        
+        # No new PromptExecution is recorded for a cache hit
+        return {**cached, "execution_id": None}
+    
+    def _cache_prompt_result(self, cache_key: str, prompt_result: Dict[str, Any]):
+        """Memoize a prompt result, evicting the oldest entry when full"""
+        
+        _PROMPT_RESULT_CACHE.set(cache_key, prompt_result)
+    
     def _calculate_workflow_relevance(
         self,
-        workflow: Workflow,
+        workflows: List[Workflow],
         context: Dict[str, Any],
-        client_config: Optional[ClientWorkflowConfig]
-    ) -> float:
-        """Calculate relevance score for workflow suggestion"""
+        custom_workflows: FrozenSet[str]
+    ) -> np.ndarray:
+        """Calculate relevance scores for workflow suggestions"""
         
-        score = 0.0
+        count = len(workflows)
         
         # Base score from usage and success rate
-        usage_score = min(workflow.execution_count / 100, 1.0) * 0.3
-        success_score = workflow.success_rate * 0.3
+        execution_counts = np.fromiter((w.execution_count or 0 for w in workflows), dtype=np.float64, count=count)
+        success_rates = np.fromiter((w.success_rate or 0.0 for w in workflows), dtype=np.float64, count=count)
         
-        score += usage_score + success_score
+        scores = np.minimum(execution_counts / 100, 1.0) * 0.3 + success_rates * 0.3
         
         # Trigger condition matching
-        if workflow.trigger_conditions and context:
-            conditions = workflow.trigger_conditions
-            matches = 0
-            total_conditions = len(conditions)
-            
-            for condition_key, condition_value in conditions.items():
-                if context.get(condition_key) == condition_value:
-                    matches += 1
-            
-            if total_conditions > 0:
-                score += (matches / total_conditions) * 0.4
+        if context:
+            match_ratios = np.fromiter(
+                (self._trigger_match_ratio(w.trigger_conditions, context) for w in workflows),
+                dtype=np.float64,
+                count=count
+            )
+            scores += match_ratios * 0.4
         
         # Client customization bonus
-        if client_config and workflow.name in client_config.custom_workflows:
-            score += 0.2
+        if custom_workflows:
+            scores += np.fromiter((w.name in custom_workflows for w in workflows), dtype=bool, count=count) * 0.2
+        
+        return np.minimum(scores, 1.0)
+    
+    def _trigger_match_ratio(self, conditions: Optional[Dict[str, Any]], context: Dict[str, Any]) -> float:
+        """Fraction of a workflow's trigger conditions satisfied by the context"""
+        
+        if not conditions:
+            return 0.0
+        
+        matches = sum(1 for key, value in conditions.items() if context.get(key) == value)
+        return matches / len(conditions)
+    
+    def _estimate_duration(self, workflow: Workflow) -> float:
+        """Expected run time in minutes: observed average, else the configured limit"""
+        
+        if workflow.average_completion_time:
+            return workflow.average_completion_time
         
-        return min(score, 1.0)
+        return workflow.max_execution_time_minutes
     
-    async def _get_workflow_steps(self, workflow_id: str) -> List[WorkflowStep]:
-        """Get workflow steps in order"""
+    def _get_required_context(self, workflow: Workflow) -> List[str]:
+        """Context keys the workflow's trigger conditions are matched against"""
+        
+        return list(workflow.trigger_conditions or {})
+    
+    async def _get_workflow_steps(self, workflow_id: str, version: str) -> Tuple[StepSpec, ...]:
+        """Get workflow steps in order, cached per workflow version"""
+        
+        cache_key = (str(workflow_id), version)
+        steps = _STEPS_CACHE.get(cache_key)
+        if steps is not None:
+            return steps
         
         result = await self.db.execute(
             select(WorkflowStep)
@@ -609,7 +942,317 @@ class WorkflowEngine:
             .order_by(WorkflowStep.order_index)
         )
         
-        return result.scalars().all()
+        steps = tuple(self._build_step_spec(step) for step in result.scalars())
+        self._cache_workflow_steps(cache_key, steps)
+        
+        return steps
+    
+    def _cache_workflow_steps(self, cache_key: Tuple[str, str], steps: Tuple[StepSpec, ...]):
+        """Store a workflow version's steps, evicting the oldest entry when full"""
+        
+        _STEPS_CACHE.set(cache_key, steps)
+    
+    async def _create_workflow_steps(self, workflow: Workflow, step_definitions: List[Dict[str, Any]]):
+        """Insert all steps of a new workflow in one statement and warm the steps cache"""
+        
+        rows = []
+        
+        for position, definition in enumerate(step_definitions):
+            prompt_template_id = definition.get("prompt_template_id")
+            rows.append({
+                "id": uuid.uuid4(),
+                "workflow_id": workflow.id,
+                "name": definition["name"],
+                "step_type": WorkflowStepType(definition["step_type"]),
+                "order_index": definition.get("order_index", position),
+                "config": definition.get("config", {}),
+                "input_mapping": definition.get("input_mapping", {}),
+                "output_mapping": definition.get("output_mapping", {}),
+                "next_step_conditions": definition.get("next_step_conditions", []),
+                "timeout_seconds": definition.get("timeout_seconds", 300),
+                "retry_config": definition.get("retry_config", {}),
+                "prompt_template_id": uuid.UUID(str(prompt_template_id)) if prompt_template_id else None
+            })
+        
+        if not rows:
+            return
+        
+        await self.db.execute(insert(WorkflowStep), rows)
+        await self.db.commit()
+        
+        # Build the cached snapshot from the inserted rows instead of selecting them back
+        steps = sorted((WorkflowStep(**row) for row in rows), key=lambda step: step.order_index)
+        self._cache_workflow_steps(
+            (str(workflow.id), workflow.version),
+            tuple(self._build_step_spec(step) for step in steps)
+        )
+    
+    def _build_step_spec(self, step: WorkflowStep) -> StepSpec:
+        """Snapshot an ORM step into a cacheable StepSpec"""
+        
+        return StepSpec(
+            id=step.id,
+            name=step.name,
+            step_type=step.step_type,
+            order_index=step.order_index,
+            config=step.config or {},
+            input_mapping=step.input_mapping or {},
+            output_mapping=step.output_mapping or {},
+            next_step_conditions=step.next_step_conditions or [],
+            timeout_seconds=step.timeout_seconds,
+            retry_config=step.retry_config or {},
+            prompt_template_id=step.prompt_template_id,
+            consumes=self._step_consumes(step),
+            produces=self._step_produces(step),
+            compiled_conditions=tuple(
+                (condition, self._compile_condition(condition))
+                for condition in (step.config or {}).get("conditions", [])
+            ) if step.step_type == WorkflowStepType.CONDITION else (),
+            payload_template=self._compile_payload(
+                (step.config or {}).get("payload", {})
+            ) if step.step_type == WorkflowStepType.WEBHOOK else None,
+            value_path=self._compile_context_path((step.config or {}).get("variable_value"))
+            if step.step_type == WorkflowStepType.ACTION else None,
+            compiled_next_steps=tuple(
+                (
+                    str(condition.get("next_step_id")),
+                    self._compile_condition(condition) if "operator" in condition else lambda context: True
+                )
+                for condition in step.next_step_conditions or []
+                if isinstance(condition, dict) and condition.get("next_step_id")
+            )
+        )
+    
+    def _compile_condition(self, condition: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+        """Build a predicate for a condition with its operator and context path resolved up front"""
+        
+        compare = _CONDITION_OPERATORS.get(condition.get("operator"))
+        left = condition.get("left")
+        right = condition.get("right")
+        path = self._compile_context_path(left)
+        
+        if compare is None:
+            return lambda context: False
+        
+        if path is None:
+            return lambda context: compare(left, right)
+        
+        return lambda context: compare(_resolve_context_path(context, path), right)
+    
+    def _compile_context_path(self, expression: Any) -> Optional[Tuple[str, ...]]:
+        """Split a "context.a.b" expression into its key path, or None if it is a literal"""
+        
+        if not isinstance(expression, str) or not expression.startswith("context."):
+            return None
+        
+        return tuple(expression.removeprefix("context.").split("."))
+    
+    def _compile_payload(self, payload: Any) -> PayloadTemplate:
+        """Walk a webhook payload once and collect its templated leaves"""
+        
+        parameters = []
+        
+        def walk(node: Any, path: Tuple[Any, ...]):
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    walk(value, path + (key,))
+            elif isinstance(node, list):
+                for position, value in enumerate(node):
+                    walk(value, path + (position,))
+            elif isinstance(node, str):
+                render = self._compile_payload_string(node)
+                if render is not None:
+                    parameters.append((path, render))
+        
+        walk(payload, ())
+        
+        return PayloadTemplate(skeleton=json_dumps(payload), parameters=tuple(parameters))
+    
+    def _compile_payload_string(self, value: str) -> Optional[Callable[[Dict[str, Any]], Any]]:
+        """Renderer for a payload string referencing the context, or None for plain literals"""
+        
+        # A bare "context.a.b" leaf takes the referenced value as-is
+        path = self._compile_context_path(value)
+        if path is not None:
+            return lambda context: _resolve_context_path(context, path)
+        
+        # Otherwise substitute {{name}} placeholders; unknown names are left in place
+        segments = []
+        position = 0
+        
+        for match in _PLACEHOLDER_RE.finditer(value):
+            segments.append(value[position:match.start()])
+            segments.append((tuple(match.group(1).removeprefix("context.").split(".")), match.group(0)))
+            position = match.end()
+        
+        if not segments:
+            return None
+        
+        segments.append(value[position:])
+        
+        def render(context: Dict[str, Any]) -> str:
+            rendered = []
+            for segment in segments:
+                if isinstance(segment, str):
+                    rendered.append(segment)
+                else:
+                    path, placeholder = segment
+                    resolved = _resolve_context_path(context, path)
+                    rendered.append(placeholder if resolved is None else str(resolved))
+            return "".join(rendered)
+        
+        return render
+    
+    def _process_payload_variables(self, template: PayloadTemplate, context: Dict[str, Any]) -> Any:
+        """Build a webhook payload from its compiled template and the context"""
+        
+        payload = json_loads(template.skeleton)
+        
+        for path, render in template.parameters:
+            if not path:
+                return render(context)
+            
+            target = payload
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = render(context)
+        
+        return payload
+    
+    def _step_consumes(self, step: WorkflowStep) -> Optional[FrozenSet[str]]:
+        """Top-level context keys a step reads, or None if it cannot be determined"""
+        
+        config = step.config or {}
+        
+        if step.step_type == WorkflowStepType.PROMPT:
+            expressions = (step.input_mapping or {}).values()
+        elif step.step_type == WorkflowStepType.CONDITION:
+            expressions = [condition.get("left") for condition in config.get("conditions", [])]
+        elif step.step_type == WorkflowStepType.ACTION and config.get("action_type") == "set_variable":
+            expressions = [config.get("variable_value")]
+        elif step.step_type == WorkflowStepType.DELAY:
+            expressions = []
+        elif step.step_type == WorkflowStepType.WEBHOOK:
+            return frozenset(self._payload_context_keys(
+                [config.get("payload", {}), config.get("webhook_url")]
+            ))
+        else:
+            return None
+        
+        return frozenset(
+            expression[len("context."):].split(".")[0]
+            for expression in expressions
+            if isinstance(expression, str) and expression.startswith("context.")
+        )
+    
+    def _payload_context_keys(self, payload: Any) -> Set[str]:
+        """Top-level context keys referenced by a payload's strings, as _compile_payload_string reads them"""
+        
+        if isinstance(payload, dict):
+            payload = payload.values()
+        elif not isinstance(payload, list):
+            payload = [payload]
+        
+        keys = set()
+        
+        for value in payload:
+            if isinstance(value, (dict, list)):
+                keys.update(self._payload_context_keys(value))
+            elif isinstance(value, str):
+                path = self._compile_context_path(value)
+                if path is not None:
+                    keys.add(path[0])
+                else:
+                    keys.update(
+                        match.group(1).removeprefix("context.").split(".")[0]
+                        for match in _PLACEHOLDER_RE.finditer(value)
+                    )
+        
+        return keys
+    
+    def _step_produces(self, step: WorkflowStep) -> Optional[FrozenSet[str]]:
+        """Context keys a step writes, or None if it cannot be determined"""
+        
+        config = step.config or {}
+        
+        if step.step_type == WorkflowStepType.PROMPT:
+            return frozenset(step.output_mapping or {})
+        elif step.step_type == WorkflowStepType.CONDITION:
+            return frozenset({"condition_result", "matched_condition"})
+        elif step.step_type == WorkflowStepType.ACTION and config.get("action_type") == "set_variable":
+            return frozenset({config.get("variable_name")})
+        elif step.step_type == WorkflowStepType.DELAY:
+            return frozenset({"delayed_seconds"})
+        elif step.step_type == WorkflowStepType.WEBHOOK:
+            return frozenset({"webhook_response"})
+        
+        return None
+    
+    def _layer_end(self, steps: Tuple[StepSpec, ...], start: int, strict_order: bool) -> int:
+        """End index of the run of independent steps starting at ``start``
+        
+        Steps join the layer in declared order until one reads a key written
+        earlier in the layer. Condition, delay and branching steps always run
+        alone, and at most one prompt step (which uses the shared database
+        session) runs per layer. Side-effecting steps may only start a layer,
+        so they are never sent when an earlier step of their layer fails.
+        """
+        
+        if strict_order or self._is_layer_barrier(steps[start]):
+            return start + 1
+        
+        produced = set(steps[start].produces or ())
+        unknown_produces = steps[start].produces is None
+        has_prompt = steps[start].step_type == WorkflowStepType.PROMPT
+        end = start + 1
+        
+        while end < len(steps):
+            step = steps[end]
+            
+            if self._is_layer_barrier(step) or self._has_side_effects(step):
+                break
+            if step.step_type == WorkflowStepType.PROMPT and has_prompt:
+                break
+            if step.consumes is None or unknown_produces or produced.intersection(step.consumes):
+                break
+            
+            produced.update(step.produces or ())
+            unknown_produces = step.produces is None
+            has_prompt = has_prompt or step.step_type == WorkflowStepType.PROMPT
+            end += 1
+        
+        return end
+    
+    def _is_layer_barrier(self, step: StepSpec) -> bool:
+        """Whether a step must run on its own rather than alongside others"""
+        
+        return (
+            step.step_type in (WorkflowStepType.CONDITION, WorkflowStepType.DELAY)
+            or bool(step.next_step_conditions)
+        )
+    
+    def _has_side_effects(self, step: StepSpec) -> bool:
+        """Whether a step reaches an external system (webhook or API call action)"""
+        
+        return (
+            step.step_type == WorkflowStepType.WEBHOOK
+            or (step.step_type == WorkflowStepType.ACTION and step.config.get("action_type") == "api_call")
+        )
+    
+    async def _get_custom_workflows(self, tenant_id: str, domain: str) -> FrozenSet[str]:
+        """Get the client's custom workflow names for a domain"""
+        
+        cache_key = (str(tenant_id), domain)
+        cached = _CUSTOM_WORKFLOWS_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        client_config = await self._get_client_config(tenant_id, domain)
+        custom_workflows = frozenset(client_config.custom_workflows or []) if client_config else frozenset()
+        
+        _CUSTOM_WORKFLOWS_CACHE.set(cache_key, custom_workflows)
+        
+        return custom_workflows
     
     async def _get_client_config(self, tenant_id: str, domain: str) -> Optional[ClientWorkflowConfig]:
         """Get client-specific configuration for domain"""
@@ -627,51 +1270,29 @@ class WorkflowEngine:
         
         return result.scalar()
     
-    def _get_context_value(self, expression: str, context: Dict[str, Any]) -> Any:
-        """Get value from context using dot notation"""
-        
-        if not expression.startswith("context."):
-            return expression
-        
-        keys = expression.replace("context.", "").split(".")
-        value = context
-        
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return None
-        
-        return value
-    
-    def _evaluate_condition(self, left: Any, operator: str, right: Any) -> bool:
-        """Evaluate a condition"""
-        
-        if operator == "equals":
-            return left == right
-        elif operator == "not_equals":
-            return left != right
-        elif operator == "greater_than":
-            return left > right
-        elif operator == "less_than":
-            return left < right
-        elif operator == "contains":
-            return right in str(left)
-        elif operator == "starts_with":
-            return str(left).startswith(str(right))
-        elif operator == "ends_with":
-            return str(left).endswith(str(right))
-        else:
-            return False
-    
     async def _update_workflow_stats(self, workflow_id: str, success: bool):
         """Update workflow usage statistics"""
         
+        success_increment = 1 if success else 0
+        
+        # Counters may still be NULL on rows created before they had server defaults
+        execution_count = func.coalesce(Workflow.execution_count, 0)
+        success_count = func.coalesce(Workflow.success_count, 0)
+        
+        # Recompute the success rate from the running counters in the same statement
         await self.db.execute(
             update(Workflow)
             .where(Workflow.id == workflow_id)
             .values(
-                execution_count=Workflow.execution_count + 1,
+                execution_count=execution_count + 1,
+                success_count=success_count + success_increment,
+                success_rate=cast(success_count + success_increment, Float) / (execution_count + 1),
                 last_executed_at=func.now()
             )
-        )
\ No newline at end of file
+        )
+
+
+async def close_workflow_http_session():
+    """Close the shared workflow HTTP session on application shutdown"""
+    if _HTTP_SESSION is not None:
+        await _HTTP_SESSION.close()
@@ -9,82 +9,241 @@ import os
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from typing import Optional, Dict, Any, Iterable
+from sqlalchemy import make_url, select, text, cast, literal, Text, JSON
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
 from app.core.config import settings
+from app.core.serialization import json_dumps_str, json_loads
 from app.models.tenant import Tenant
 
+# Created on first use and reused by later calls; closed by dispose_engine()
+_engine: Optional[AsyncEngine] = None
+_async_session: Optional[async_sessionmaker] = None
+
+# Demo tenant row, created through create_tenants
+_DEMO_TENANT = {
+    "name": "Demo Company",
+    "slug": "demo",
+    "contact_email": "demo@example.com",
+    "contact_phone": "+1234567890",
+    "subscription_tier": "free",
+    "is_active": True,
+    "web_widget_enabled": True,
+    "whatsapp_enabled": False,
+    "telegram_enabled": False,
+    "monthly_message_limit": 1000,
+    "monthly_message_count": 0,
+    "config": {
+        "welcome_message": "Hello! Welcome to our demo chatbot. How can I help you today?",
+        "default_response": "I'm a demo chatbot. I can help answer your questions!",
+        "business_info": {
+            "name": "Demo Company",
+            "industry": "Technology",
+            "description": "A demo company for testing ComChat"
+        }
+    }
+}
+
+# Batches at least this large are loaded with COPY instead of a multi-row INSERT
+_COPY_MIN_ROWS = 100
+
+# Columns written by create_tenants; server-defaulted ones are left to PostgreSQL
+_TENANT_COLUMNS = [column for column in Tenant.__table__.columns if column.server_default is None]
+
+
+def get_session_factory() -> async_sessionmaker:
+    """Get the shared session factory, creating the engine on first use"""
+    global _engine, _async_session
+    
+    if _async_session is None:
+        # Force the asyncpg driver whatever driver or query the configured DSN names
+        database_url = make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg")
+        _engine = create_async_engine(
+            database_url,
+            json_serializer=json_dumps_str,
+            json_deserializer=json_loads,
+            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=10,
+            pool_recycle=1800
+        )
+        _async_session = async_sessionmaker(_engine, expire_on_commit=False)
+    
+    return _async_session
+
+
+async def dispose_engine():
+    """Close the shared engine's pooled connections"""
+    global _engine, _async_session
+    
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _async_session = None
+
 
 async def create_demo_tenant():
     """Create a demo tenant in the database"""
     
-    # Create async engine
-    database_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-    engine = create_async_engine(database_url)
+    await create_tenants([_DEMO_TENANT], label="Demo tenant")
+
+
+def _tenant_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Complete a tenant row with the model's Python-side column defaults"""
+    record = {}
     
-    # Create async session
-    async_session = sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    for column in _TENANT_COLUMNS:
+        if column.key in row:
+            record[column.key] = row[column.key]
+        elif column.default is None:
+            record[column.key] = None
+        elif column.default.is_callable:
+            record[column.key] = column.default.arg(None)
+        else:
+            record[column.key] = column.default.arg
     
-    async with async_session() as session:
-        try:
-            # Check if demo tenant already exists
-            from sqlalchemy import select
-            result = await session.execute(
-                select(Tenant).where(Tenant.slug == "demo")
-            )
-            existing_tenant = result.scalar_one_or_none()
-            
-            if existing_tenant:
-                print("Demo tenant already exists!")
-                print(f"ID: {existing_tenant.id}")
-                print(f"Name: {existing_tenant.name}")
-                print(f"Slug: {existing_tenant.slug}")
-                return
+    return record
+
+
+async def create_tenants(rows: Iterable[Dict[str, Any]], label: str = "Tenant") -> int:
+    """Create tenants in bulk, skipping slugs that already exist; returns the number created
+    
+    ``label`` names the tenant in the report printed for a single row.
+    """
+    
+    records = [_tenant_record(row) for row in rows]
+    if not records:
+        return 0
+    
+    if len(records) == 1:
+        return await _create_tenant(records[0], label)
+    
+    async_session = get_session_factory()
+    
+    try:
+        # Commits on success and rolls back on error
+        async with async_session.begin() as session:
+            # Serialize concurrent seeds; overlapping multi-row upserts can deadlock
+            await session.execute(text("SELECT pg_advisory_xact_lock(hashtext('tenants:seed'))"))
             
-            # Create new demo tenant
-            demo_tenant = Tenant(
-                name="Demo Company",
-                slug="demo",
-                contact_email="demo@example.com",
-                contact_phone="+1234567890",
-                subscription_tier="free",
-                is_active=True,
-                web_widget_enabled=True,
-                whatsapp_enabled=False,
-                telegram_enabled=False,
-                monthly_message_limit=1000,
-                monthly_message_count=0,
-                config={
-                    "welcome_message": "Hello! Welcome to our demo chatbot. How can I help you today?",
-                    "default_response": "I'm a demo chatbot. I can help answer your questions!",
-                    "business_info": {
-                        "name": "Demo Company",
-                        "industry": "Technology",
-                        "description": "A demo company for testing ComChat"
-                    }
-                }
+            if len(records) < _COPY_MIN_ROWS:
+                result = await session.execute(
+                    pg_insert(Tenant)
+                    .on_conflict_do_nothing(index_elements=[Tenant.slug])
+                    .returning(Tenant.id),
+                    records
+                )
+                created = len(result.all())
+            else:
+                # COPY into a staging table, then insert with the same conflict handling
+                columns = [column.key for column in _TENANT_COLUMNS]
+                column_list = ", ".join(columns)
+                
+                await session.execute(text(
+                    "CREATE TEMP TABLE tenants_import (LIKE tenants INCLUDING DEFAULTS) ON COMMIT DROP"
+                ))
+                
+                connection = await session.connection()
+                raw_connection = await connection.get_raw_connection()
+                await raw_connection.driver_connection.copy_records_to_table(
+                    "tenants_import",
+                    records=[
+                        tuple(
+                            json_dumps_str(record[column]) if column == "config" else record[column]
+                            for column in columns
+                        )
+                        for record in records
+                    ],
+                    columns=columns
+                )
+                
+                created = await session.scalar(text(
+                    f"WITH inserted AS ("
+                    f"INSERT INTO tenants ({column_list}) SELECT {column_list} FROM tenants_import "
+                    f"ON CONFLICT (slug) DO NOTHING RETURNING 1"
+                    f") SELECT count(*) FROM inserted"
+                ))
+        
+        sys.stdout.write(f"✅ Created {created} of {len(records)} tenants\n")
+        sys.stdout.flush()
+        return created
+        
+    except Exception as e:
+        print(f"❌ Error creating tenants: {e}")
+        raise
+
+
+async def _create_tenant(record: Dict[str, Any], label: str) -> int:
+    """Create a single tenant unless its slug is taken and report it; returns the number created"""
+    
+    async_session = get_session_factory()
+    
+    try:
+        # Commits on success and rolls back on error
+        async with async_session.begin() as session:
+            # Insert unless the slug is taken, in a single round trip; config is bound as JSON text
+            result = await session.execute(
+                pg_insert(Tenant)
+                .values({
+                    **record,
+                    "config": cast(literal(json_dumps_str(record["config"]), Text), JSON)
+                })
+                .on_conflict_do_nothing(index_elements=[Tenant.slug])
+                .returning(Tenant.id, Tenant.name, Tenant.slug, Tenant.contact_email, Tenant.is_active)
             )
+            tenant = result.one_or_none()
             
-            session.add(demo_tenant)
-            await session.commit()
-            await session.refresh(demo_tenant)
-            
-            print("✅ Demo tenant created successfully!")
-            print(f"ID: {demo_tenant.id}")
-            print(f"Name: {demo_tenant.name}")
-            print(f"Slug: {demo_tenant.slug}")
-            print(f"Email: {demo_tenant.contact_email}")
-            print(f"Active: {demo_tenant.is_active}")
-            
-        except Exception as e:
-            await session.rollback()
-            print(f"❌ Error creating demo tenant: {e}")
-            raise
-        finally:
-            await engine.dispose()
+            if tenant is None:
+                # Tenant already exists; only the printed columns, no ORM object
+                result = await session.execute(
+                    select(Tenant.id, Tenant.name, Tenant.slug).where(Tenant.slug == record["slug"])
+                )
+                existing_tenant = result.one()
+        
+        if tenant is None:
+            lines = [
+                f"{label} already exists!",
+                f"ID: {existing_tenant.id}",
+                f"Name: {existing_tenant.name}",
+                f"Slug: {existing_tenant.slug}",
+            ]
+        else:
+            lines = [
+                f"✅ {label} created successfully!",
+                f"ID: {tenant.id}",
+                f"Name: {tenant.name}",
+                f"Slug: {tenant.slug}",
+                f"Email: {tenant.contact_email}",
+                f"Active: {tenant.is_active}",
+            ]
+        
+        # One write for the whole report
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+        
+        return 0 if tenant is None else 1
+        
+    except Exception as e:
+        print(f"❌ Error creating {label.lower()}: {e}")
+        raise
+
+
+async def main():
+    """Script entrypoint: create the tenant, then release connections"""
+    try:
+        await create_demo_tenant()
+    finally:
+        await dispose_engine()
 
 
 if __name__ == "__main__":
-    asyncio.run(create_demo_tenant())
\ No newline at end of file
+    # uvloop ships with uvicorn[standard]; fall back to the default loop without it
+    try:
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+    
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
\ No newline at end of file